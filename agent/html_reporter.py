@@ -4,11 +4,26 @@ HTML Report Generator for Test Results
 Creates professional HTML reports that can be downloaded and viewed in browser
 """
 
+import re
 from typing import List
 from .state import TestResult
 from datetime import datetime
 
 
+# Saltos de línea + indentación entre tags (no afecta el render: HTML colapsa espacios)
+_MINIFY_RE = re.compile(r'>\s*\n\s*<')
+# Bloques <pre> (errores de Karate con cuerpos XML/HTML): ahí los espacios sí se renderizan
+_PRE_BLOCK_RE = re.compile(r'(<pre\b[^>]*>.*?</pre>)', re.DOTALL | re.IGNORECASE)
+
+
+def _minify(html: str) -> str:
+    """Strip inter-tag whitespace everywhere except inside <pre> blocks"""
+    parts = _PRE_BLOCK_RE.split(html)
+    # split con grupo: índices pares = fuera de <pre>, impares = el bloque <pre> intacto
+    parts[::2] = [_MINIFY_RE.sub('><', part) for part in parts[::2]]
+    return ''.join(parts)
+
+
 def generate_html_report(results: List[TestResult], run_id: int = None, build_number: str = "unknown") -> str:
     """Generate a professional HTML report from test results"""
     
@@ -304,4 +319,4 @@ def generate_html_report(results: List[TestResult], run_id: int = None, build_nu
 </html>
 """
     
-    return html
+    return _minify(html)
@@ -7,6 +7,8 @@ Loads Karate results and syncs to TestRail with AI feedback
 import os
 import sys
 import json
+import logging
+import logging.handlers
 import subprocess
 from uuid import uuid4
 from dotenv import load_dotenv
@@ -45,6 +47,18 @@ def _load_config():
 
 _load_config()
 
+
+def _configure_logging() -> logging.handlers.MemoryHandler:
+    """Route the agent package loggers to stdout (TESTRAIL_DEBUG=1 also dumps each case payload)"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    # Per-case progress is buffered and written in blocks (warnings/errors go out immediately)
+    buffered = logging.handlers.MemoryHandler(capacity=1000, flushLevel=logging.WARNING, target=handler)
+    package_logger = logging.getLogger("agent")
+    package_logger.addHandler(buffered)
+    package_logger.setLevel(logging.DEBUG if os.getenv("TESTRAIL_DEBUG") else logging.INFO)
+    return buffered
+
 def _get_git_commit() -> str:
     """Get current git commit SHA or fallback to local"""
     try:
@@ -116,6 +130,8 @@ def find_karate_results() -> str:
 
 def main():
     """Main agent flow"""
+    log_buffer = _configure_logging()
+    
     print("\n" + "="*60)
     print("🧪 TestRail Integration Agent with AI Feedback")
     print("="*60)
@@ -166,15 +182,18 @@ def main():
         sync = TestRailSync(
             client,
             settings.testrail_project_id,
-            settings.testrail_suite_id
+            settings.testrail_suite_id,
+            requests_per_minute=settings.testrail_requests_per_minute,
         )
         case_id_map = sync.sync_cases_from_karate(results)
-        print(f"✓ Synced {len(case_id_map)} test cases")
     except Exception as e:
         import traceback
         print(f"❌ Sync error: {e}")
         print(f"   {traceback.format_exc()}")
         return
+    finally:
+        # Volcar el detalle por caso del sync antes de seguir con el run
+        log_buffer.flush()
     
     # Create test run
     print("\n🚀 Creating test run...")
@@ -105,8 +105,6 @@ class SlackNotifier:
             else:
                 status_emoji = "🔴"
 
-            # Clean AI text (remove markdown formatting)
-            ai_text = (ai_comment or "No analysis").replace("**", "").replace("_", "").replace("`", "")
             # Clean AI text - NO LIMIT on length, Slack will handle it
             ai_text = (ai_comment or "No analysis").replace("**", "").replace("_", "").replace("`", "").strip()
 
@@ -140,6 +138,8 @@ class SlackNotifier:
             if commit_sha:
                 context_items.append(commit_sha[:7])
             context_text = " • ".join(context_items)
+            # Un solo timestamp para el contexto y el footer del attachment
+            sent_ts = int(datetime.utcnow().timestamp())
 
             # Build Slack message (using Block Kit format - clean and professional)
             payload = {
@@ -229,7 +229,7 @@ class SlackNotifier:
                         "elements": [
                             {
                                 "type": "mrkdwn",
-                                "text": f"{context_text} • <t:{int(datetime.utcnow().timestamp())}:t>"
+                                "text": f"{context_text} • <t:{sent_ts}:t>"
                             }
                         ]
                     }
@@ -238,7 +238,7 @@ class SlackNotifier:
                     {
                         "color": color,
                         "footer": "agent-karate",
-                        "ts": int(datetime.utcnow().timestamp())
+                        "ts": sent_ts
                     }
                 ]
             }
@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import TypedDict, List, Any, Optional
 from pydantic import BaseModel, Field
 
@@ -16,6 +17,13 @@ class TestResult(BaseModel):
     examples: List[dict] = Field(default_factory=list)  # Datos de Examples si es Scenario Outline
     tags: List[str] = Field(default_factory=list)  # Tags del scenario (@tag1, @tag2)
     example_index: int = -1  # Index del ejemplo si es Scenario Outline (-1 si no)
+    
+    @cached_property
+    def automation_id(self) -> str:
+        """ID del caso en TestRail: 'feature.scenario' sin el sufijo '.N' de los ejemplos"""
+        if self.feature == self.scenario:
+            return self.feature
+        return f"{self.feature}.{self.scenario.partition('.')[0]}"
 
 
 class TestRailRunState(TypedDict):
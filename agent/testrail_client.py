@@ -6,9 +6,22 @@ Wrapper for TestRail REST API v2
 
 import requests
 import json
-from typing import Optional, List, Dict, Any
+import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, List, Dict, Any, Iterator
 from pydantic_settings import BaseSettings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Cuerpo máximo de una respuesta de error que se imprime (las páginas HTML de error pueden ser enormes)
+_ERROR_BODY_LIMIT = 500
+
 
 class TestRailSettings(BaseSettings):
     testrail_url: str
@@ -16,6 +29,11 @@ class TestRailSettings(BaseSettings):
     testrail_api_key: str
     testrail_project_id: int
     testrail_suite_id: int = 1
+    # Timeouts (connect, read) en segundos: un nodo colgado no debe bloquear un worker para siempre
+    testrail_connect_timeout: float = 10.0
+    testrail_read_timeout: float = 30.0
+    # Requests/min del sync en paralelo (TestRail Cloud = 180, 0 = sin límite)
+    testrail_requests_per_minute: int = 180
     
     model_config = {"env_file": ".env", "extra": "ignore"}
     
@@ -27,6 +45,26 @@ class TestRailSettings(BaseSettings):
         self.testrail_api_key = self.testrail_api_key.strip()
 
 
+class _TestRailRetry(Retry):
+    """429 se reintenta para cualquier método (TestRail no procesó la request); 5xx solo para los idempotentes"""
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter que aplica un timeout por defecto a toda request de la Session que no pase uno propio"""
+    
+    def __init__(self, *args, timeout: Optional[tuple] = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+
 class TestRailClient:
     """TestRail API Client"""
     
@@ -38,11 +76,49 @@ class TestRailClient:
             "Accept": "application/json"
         }
         self.base_url = f"{settings.testrail_url.rstrip('/')}/index.php?/api/v2"
+        
+        # Session compartida: keep-alive reutiliza la conexión TLS entre llamadas.
+        # 429 (rate limit) se reintenta respetando Retry-After: la request no se
+        # procesó, así que es seguro incluso para POST. Los 5xx transitorios solo
+        # se reintentan en GET (un add_case repetido podría duplicar el caso).
+        # Backoff exponencial: 1, 2, 4, 8 s.
+        self.session = requests.Session()
+        retry = _TestRailRetry(
+            total=5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            backoff_factor=1,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = _TimeoutHTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=8,
+            max_retries=retry,
+            timeout=(settings.testrail_connect_timeout, settings.testrail_read_timeout),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Metadata casi estática: se pide una vez por cliente (no se cachean errores)
+        self._users: Optional[List[Dict[str, Any]]] = None
+        self._case_types: Optional[List[Dict[str, Any]]] = None
+    
+    @staticmethod
+    def _json_body(payload: Any) -> Dict[str, Any]:
+        """Request kwargs for a JSON body (serialized with orjson when installed)"""
+        if orjson is None:
+            return {"json": payload}
+        return {"data": orjson.dumps(payload)}
+    
+    @staticmethod
+    def _brief_error(response: requests.Response) -> str:
+        """Error body truncated to _ERROR_BODY_LIMIT characters (no JSON parsing)"""
+        return response.text[:_ERROR_BODY_LIMIT]
     
     def check_connection(self) -> bool:
         """Verify connection to TestRail"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/get_projects",
                 auth=self.auth,
                 headers=self.headers
@@ -54,7 +130,7 @@ class TestRailClient:
                 return True
             else:
                 print(f"❌ Failed to connect to TestRail. Status: {response.status_code}")
-                print(f"   Error: {response.text}")
+                print(f"   Error: {self._brief_error(response)}")
                 return False
         except Exception as e:
             print(f"❌ Error connecting to TestRail: {e}")
@@ -65,7 +141,7 @@ class TestRailClient:
         """GET /get_project/{project_id}"""
         url = f"{self.base_url}/get_project/{project_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -76,7 +152,7 @@ class TestRailClient:
         """GET /get_suite/{suite_id}"""
         url = f"{self.base_url}/get_suite/{suite_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -87,7 +163,7 @@ class TestRailClient:
         """GET /get_sections/{project_id}&suite_id={suite_id}"""
         url = f"{self.base_url}/get_sections/{project_id}"
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
                 auth=self.auth,
                 headers=self.headers,
@@ -111,32 +187,48 @@ class TestRailClient:
         """GET /get_case/{case_id}"""
         url = f"{self.base_url}/get_case/{case_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"❌ Error getting case {case_id}: {e}")
             return None
     
-    def get_cases(self, project_id: int, suite_id: int) -> List[Dict[str, Any]]:
-        """GET /get_cases/{project_id}&suite_id={suite_id}"""
+    def iter_cases(self, project_id: int, suite_id: int) -> Iterator[Dict[str, Any]]:
+        """GET /get_cases/{project_id}&suite_id={suite_id}, yielding one page at a time"""
         url = f"{self.base_url}/get_cases/{project_id}"
-        try:
-            response = requests.get(
+        params = {"suite_id": suite_id}
+        while True:
+            response = self.session.get(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                params={"suite_id": suite_id}
+                params=params
             )
             response.raise_for_status()
             data = response.json()
             # TestRail API v2 wraps results in a dict with 'cases' key
             if isinstance(data, dict) and 'cases' in data:
-                return data['cases']
+                yield from data['cases']
+                # TestRail 6.7+: paginated in pages of 250, '_links.next' is null on the last one
+                if not (data.get('_links') or {}).get('next'):
+                    return
+                params = {
+                    "suite_id": suite_id,
+                    "offset": data.get('offset', 0) + data.get('size', len(data['cases'])),
+                }
+                continue
             # Fallback for other formats
             if isinstance(data, dict):
-                return list(data.values())
-            return data if isinstance(data, list) else []
+                yield from data.values()
+            elif isinstance(data, list):
+                yield from data
+            return
+    
+    def get_cases(self, project_id: int, suite_id: int) -> List[Dict[str, Any]]:
+        """GET /get_cases/{project_id}&suite_id={suite_id} (all pages)"""
+        try:
+            return list(self.iter_cases(project_id, suite_id))
         except Exception as e:
             print(f"❌ Error getting cases: {e}")
             return []
@@ -146,29 +238,29 @@ class TestRailClient:
         url = f"{self.base_url}/add_case/{section_id}"
         try:
 
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json=case_data
+                **self._json_body(case_data)
             )
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"❌ Error adding case: {e}")
             if hasattr(e, 'response') and e.response is not None:
-                print(f"   Response body: {e.response.text}")
+                print(f"   Response body: {self._brief_error(e.response)}")
             return None
     
     def update_case(self, case_id: int, case_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """POST /update_case/{case_id}"""
         url = f"{self.base_url}/update_case/{case_id}"
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json=case_data
+                **self._json_body(case_data)
             )
             response.raise_for_status()
             return response.json()
@@ -176,12 +268,28 @@ class TestRailClient:
             print(f"❌ Error updating case {case_id}: {e}")
             return None
     
+    def update_cases(self, suite_id: int, case_ids: List[int], case_data: Dict[str, Any]) -> bool:
+        """POST /update_cases/{suite_id} (bulk: same field values for every case_id)"""
+        url = f"{self.base_url}/update_cases/{suite_id}"
+        try:
+            response = self.session.post(
+                url,
+                auth=self.auth,
+                headers=self.headers,
+                **self._json_body({**case_data, "case_ids": case_ids})
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"⚠️ Bulk update_cases not available: {e}")
+            return False
+    
     # ===== Test Run Management =====
     def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
         """GET /get_run/{run_id}"""
         url = f"{self.base_url}/get_run/{run_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -192,7 +300,7 @@ class TestRailClient:
         """GET /get_runs/{project_id}"""
         url = f"{self.base_url}/get_runs/{project_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -203,28 +311,29 @@ class TestRailClient:
         """POST /add_run/{project_id}"""
         url = f"{self.base_url}/add_run/{project_id}"
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json=run_data
+                **self._json_body(run_data)
             )
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"❌ Error adding run: {e}")
-            print(f"   Payload: {json.dumps(run_data, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   Payload: %s", json.dumps(run_data, indent=2))
             return None
     
     def update_run(self, run_id: int, run_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """POST /update_run/{run_id}"""
         url = f"{self.base_url}/update_run/{run_id}"
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json=run_data
+                **self._json_body(run_data)
             )
             response.raise_for_status()
             return response.json()
@@ -236,11 +345,11 @@ class TestRailClient:
         """POST /close_run/{run_id}"""
         url = f"{self.base_url}/close_run/{run_id}"
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json={}
+                **self._json_body({})
             )
             response.raise_for_status()
             return True
@@ -252,7 +361,7 @@ class TestRailClient:
         """GET /get_tests/{run_id}"""
         url = f"{self.base_url}/get_tests/{run_id}"
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
                 auth=self.auth,
                 headers=self.headers
@@ -275,11 +384,11 @@ class TestRailClient:
         """POST /add_result_for_case/{run_id}/{case_id}"""
         url = f"{self.base_url}/add_result_for_case/{run_id}/{case_id}"
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json=result_data
+                **self._json_body(result_data)
             )
             response.raise_for_status()
             return response.json()
@@ -293,24 +402,24 @@ class TestRailClient:
         try:
             payload = {"results": results}
 
-            response = requests.post(
+            response = self.session.post(
                 url,
                 auth=self.auth,
                 headers=self.headers,
-                json=payload
+                **self._json_body(payload)
             )
             response.raise_for_status()
             return True
         except Exception as e:
             print(f"❌ Error adding batch results: {e}")
-            print(f"   Response: {response.text if 'response' in locals() else 'N/A'}")
+            print(f"   Response: {self._brief_error(response) if 'response' in locals() else 'N/A'}")
             return False
     
     def get_results_for_run(self, run_id: int) -> List[Dict[str, Any]]:
         """GET /get_results_for_run/{run_id}"""
         url = f"{self.base_url}/get_results_for_run/{run_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             data = response.json()
             # TestRail API v2 wraps results in a dict with 'results' key
@@ -323,13 +432,12 @@ class TestRailClient:
         except Exception as e:
             print(f"❌ Error getting results for run {run_id}: {e}")
             return []
-            return []
     
     def get_results_for_case(self, run_id: int, case_id: int) -> List[Dict[str, Any]]:
         """GET /get_results_for_case/{run_id}/{case_id}"""
         url = f"{self.base_url}/get_results_for_case/{run_id}/{case_id}"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -344,7 +452,7 @@ class TestRailClient:
             with open(filepath, 'rb') as f:
                 files = {'attachment': (filename or filepath.split('/')[-1], f)}
                 # Don't use json header for multipart
-                response = requests.post(
+                response = self.session.post(
                     url,
                     auth=self.auth,
                     files=files
@@ -356,50 +464,44 @@ class TestRailClient:
             return None    
     # ===== Users Management =====
     def get_users(self) -> List[Dict[str, Any]]:
-        """👤 GET /get_users - Obtener lista de usuarios en TestRail"""
+        """👤 GET /get_users - Obtener lista de usuarios en TestRail (cacheada)"""
+        if self._users is not None:
+            return self._users
         url = f"{self.base_url}/get_users"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             data = response.json()
             # TestRail API v2 wraps results
             if isinstance(data, dict) and 'users' in data:
-                return data['users']
-            if isinstance(data, dict):
-                return list(data.values())
-            return data if isinstance(data, list) else []
+                users = data['users']
+            elif isinstance(data, dict):
+                users = list(data.values())
+            else:
+                users = data if isinstance(data, list) else []
+            self._users = users
+            return users
         except Exception as e:
             print(f"⚠️ Error getting users list: {e}")
             return []
     
     def get_case_types(self) -> List[Dict[str, Any]]:
-        """Get available case types"""
-        url = f"{self.base_url}/get_case_types"
-        try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
-            if isinstance(data, list):
-                return data
-            if isinstance(data, dict) and 'types' in data:
-                return data['types']
-            return []
-        except Exception as e:
-            print(f"⚠️ Error getting case types: {e}")
-            return []
-
-    def get_case_types(self) -> List[Dict[str, Any]]:
-        """���️ GET /get_case_types - Obtener tipos de casos disponibles"""
+        """Get available case types (cached)"""
+        if self._case_types is not None:
+            return self._case_types
         url = f"{self.base_url}/get_case_types"
         try:
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.session.get(url, auth=self.auth, headers=self.headers)
             response.raise_for_status()
             data = response.json()
             if isinstance(data, list):
-                return data
-            if isinstance(data, dict) and 'types' in data:
-                return data['types']
-            return []
+                types = data
+            elif isinstance(data, dict) and 'types' in data:
+                types = data['types']
+            else:
+                types = []
+            self._case_types = types
+            return types
         except Exception as e:
             print(f"⚠️ Error getting case types: {e}")
             return []
@@ -67,15 +67,8 @@ class TestRailRunner:
         results_payload = []
         
         for result in test_results:
-            # Match the same logic as sync_cases_from_karate
-            if result.feature == result.scenario:
-                # Fallback mode: feature summary only
-                automation_id = result.feature
-            else:
-                # Individual scenario mode
-                scenario_clean = result.scenario.split('.')[0] if '.' in result.scenario else result.scenario
-                automation_id = f"{result.feature}.{scenario_clean}"
-            
+            # Same automation_id as sync_cases_from_karate
+            automation_id = result.automation_id
             case_id = case_id_map.get(automation_id)
             
             if not case_id:
@@ -4,15 +4,34 @@ TestRail Synchronization - ENHANCED VERSION v2
 Sync Karate test cases to TestRail with premium visual formatting
 """
 
+import io
 import os
 import re
+import sys
 import json
+import time
+import logging
+import threading
 import subprocess
-from typing import Optional, List
+from itertools import islice
+from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, TYPE_CHECKING
 from enum import Enum
-from .testrail_client import TestRailClient
 from .state import TestResult
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    # Solo para anotaciones: el cliente llega ya construido a TestRailSync
+    from .testrail_client import TestRailClient
+
+logger = logging.getLogger(__name__)
+
 
 class StepType(Enum):
     """Tipos de pasos Gherkin con iconos visuales"""
@@ -20,12 +39,260 @@ class StepType(Enum):
     WHEN = ("When", "⚡", "Action")
     THEN = ("Then", "✅", "Validation")
     AND = ("And", "➕", "Additional")
+    BUT = ("But", "➖", "Exception")
     MATCH = ("match", "🔍", "Assertion")
     
     def __init__(self, keyword: str, icon: str, label: str):
-        self.keyword = keyword
-        self.icon = icon
-        self.label = label
+        # Internados: se reutiliza un único objeto str en cada interpolación
+        self.keyword = sys.intern(keyword)
+        self.icon = sys.intern(icon)
+        self.label = sys.intern(label)
+
+
+# Lookup {keyword en minúsculas: StepType} para los pasos Gherkin con icono
+_STEP_TYPES = {st.keyword.lower(): st for st in StepType if st is not StepType.MATCH}
+
+# Pasos sin keyword Gherkin que igual son assertions (sin lowercasing del paso completo)
+_MATCH_RE = re.compile(r'match', re.IGNORECASE)
+
+# Keywords que _format_step quita del inicio del paso (case-sensitive, como en el .feature)
+_GHERKIN_KEYWORDS = frozenset(st.keyword for st in _STEP_TYPES.values())
+
+# Keyword Gherkin + cuerpo del paso en un solo match ("Android app" no es un paso And)
+_GHERKIN_RE = re.compile(
+    r'(' + '|'.join(_GHERKIN_KEYWORDS) + r')(?:\s+(.*))?',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@lru_cache(maxsize=8192)
+def _parse_gherkin(step: str) -> tuple[Optional[str], str]:
+    """Split a stripped step into (Gherkin keyword as written or None, body)"""
+    match = _GHERKIN_RE.fullmatch(step)
+    if match is None:
+        return None, step
+    return match.group(1), match.group(2) or ""
+
+
+# Los pasos (sobre todo los del Background) se repiten entre escenarios: memoizados por texto
+@lru_cache(maxsize=8192)
+def _format_step_with_icon(step: str) -> str:
+    """
+    Format step with appropriate icon based on keyword
+    """
+    step = step.strip()
+    
+    # Detect keyword (primera palabra) and add icon
+    keyword, clean = _parse_gherkin(step)
+    if keyword:
+        step_type = _STEP_TYPES[keyword.lower()]
+        return f"{step_type.icon} **{step_type.keyword}** {clean}"
+    if _MATCH_RE.search(step):
+        return f"{StepType.MATCH.icon} {step}"
+    return f"▪️ {step}"
+
+
+@lru_cache(maxsize=8192)
+def _format_step(step: str) -> str:
+    """
+    Format a Gherkin step - remove redundant keywords, clean up
+    """
+    step = step.strip()
+    
+    # Remove redundant Gherkin keywords pero mantener estructura
+    keyword, rest = _parse_gherkin(step)
+    if keyword in _GHERKIN_KEYWORDS and rest:
+        return rest
+    
+    return step
+
+
+# PR ID desde GITHUB_REF (refs/pull/123/merge) y desde el nombre de la rama
+_PULL_RE = re.compile(r'/pull/(\d+)/')
+# Patrones comunes para PR IDs, en orden: PR-123, PR123, issue-456, #789, SCRUM-4, etc
+_BRANCH_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'PR[#-]?(\d+)',      # PR-123 o PR#123
+        r'issue[#-]?(\d+)',   # issue-456
+        r'#(\d+)',            # #789
+        r'([A-Z]+-\d+)',      # SCRUM-4, JIRA-123
+    )
+)
+
+
+# Prioridad por keyword (5=Critical, 4=High, 2=Low); gana el nivel más alto encontrado
+_PRIORITY_LEVELS = {
+    'critical': 5, 'smoke': 5, 'p0': 5, 'blocker': 5, 'security': 5,
+    'important': 4, 'main': 4, 'core': 4, 'p1': 4, 'auth': 4,
+    'edge': 2, 'negative': 2, 'error': 2, 'p3': 2, 'optional': 2,
+}
+# Lookahead: encuentra keywords solapadas en una sola pasada (match por substring, como antes)
+_PRIORITY_RE = re.compile("(?=(" + "|".join(_PRIORITY_LEVELS) + "))")
+
+
+# Etiqueta que reemplaza a los prefijos 'status' en las assertions ('Then status 200' → '**HTTP Status** → 200')
+_HTTP_STATUS_LABEL = '**HTTP Status** → '
+# Prefijos verbosos de Karate en una sola alternativa anclada: 'match' se elimina, 'status' → etiqueta HTTP
+_ASSERTION_PREFIX_RE = re.compile(r'(?:And match |match )|(?P<status>(?:Then |And )?status )')
+
+
+# Marcadores de tipo de Karate ('#array', ...) → versión resaltada, en una sola pasada
+_TYPE_MARKERS = {
+    '#array': "`#array` 📋",
+    '#object': "`#object` 📦",
+    '#string': "`#string` 📝",
+    '#number': "`#number` 🔢",
+    '#boolean': "`#boolean` ✓/✗",
+}
+_TYPE_MARKER_RE = re.compile("'(" + "|".join(_TYPE_MARKERS) + ")'")
+
+
+# Badges de estado precalculados (MarkdownFormatter.status_badge)
+_STATUS_BADGES = {
+    'passed': '✅ **PASSED**',
+    'failed': '❌ **FAILED**',
+    'skipped': '⏭️ **SKIPPED**',
+}
+
+
+# Esqueleto fijo de la descripción: solo se renderizan los bloques variables
+_DESCRIPTION_TMPL = (
+    "\n## 🧪 {feature}\n\n"
+    "> **Scenario:** {scenario}\n"
+    "{tags_block}"
+    "\n"
+    "\n### 📊 Test Metrics\n\n"
+    "| Metric | Value |\n| --- | --- |\n"
+    "{metrics_rows}"
+    "\n"
+    "{background_block}"
+)
+
+# Filas opcionales de "Test Metrics", en el orden del bitmask de forma de _build_description
+_METRIC_ROW_TMPLS = (
+    "| Execution Time | ⏱️ **{duration}** |\n",
+    "| Steps Executed | 🔢 **{steps}** |\n",
+    "| Gherkin Steps | 📝 **{gherkin_steps}** |\n",
+    "| Assertions | 🔍 **{assertions}** |\n",
+    "| Test Scenarios | 📋 **{examples}** |\n",
+)
+
+
+@lru_cache(maxsize=1 << len(_METRIC_ROW_TMPLS))
+def _description_template(shape: int) -> str:
+    """_DESCRIPTION_TMPL specialized for one combination of optional metric rows"""
+    rows = "".join(row for bit, row in enumerate(_METRIC_ROW_TMPLS) if shape >> bit & 1)
+    return _DESCRIPTION_TMPL.replace("{metrics_rows}", "| Status | {badge} |\n" + rows)
+
+
+# Preconditions / Steps: cabeceras fijas y fallbacks completos (resultados sin Background / sin pasos)
+_PRECONDS_HEADER = "\n#### 🔧 Prerequisites\n\n"
+_PRECONDS_MISSING = _PRECONDS_HEADER + "> ℹ️ Background/Prerequisites not extracted from feature file\n"
+
+_STEPS_HEADER = "\n#### 📋 Test Steps\n\n"
+_FALLBACK_STEPS = (
+    _STEPS_HEADER
+    + "1. 🎯 **Setup** - Prepare test data and environment\n"
+    "2. ⚡ **Execute** - Send API request with test payload\n"
+    "3. ✅ **Verify** - Check HTTP response status code\n"
+    "4. ✅ **Validate** - Assert response body structure and values\n"
+)
+_EXAMPLES_HEADER = "\n\n---\n\n\n#### 📊 Test Data Matrix (Scenario Outline)\n\n"
+
+
+# Fila de cada validación según el estado del test (todo lo que no es passed → FAIL)
+_ASSERTION_ROW_FMT = {
+    "passed": "**`{i:02d}`** ✅ **PASS** │ {clean}\n\n",
+    "failed": "**`{i:02d}`** ❌ **FAIL** │ {clean}\n\n",
+}
+
+
+# Bloques estáticos del Expected Result: se parsean una vez al importar el módulo
+_RULE_HEAVY = "═══════════════════════════════════════════════════════\n\n"
+_RULE_LIGHT = "─────────────────────────────────────────────────────\n\n"
+
+_STATUS_BANNER_TMPL = (
+    "\n"
+    + _RULE_HEAVY
+    + "\n## {badge}\n\n"
+    + _RULE_HEAVY
+)
+
+_STATUS_BANNERS = {status: _STATUS_BANNER_TMPL.format(badge=badge) for status, badge in _STATUS_BADGES.items()}
+
+_ERROR_SECTION_TMPL = (
+    "\n"
+    + _RULE_LIGHT
+    + "\n### 🔴 Error Details\n\n"
+    "\n"
+    "⚠️ **The test failed with the following error:**\n\n"
+    "\n```\n{error}\n```\n"
+    "\n"
+)
+
+_METADATA_HEADER = (
+    "\n"
+    + _RULE_LIGHT
+    + "\n#### 📌 Test Metadata\n\n"
+    "\n"
+)
+
+
+# Ruta correcta: agent/__file__ → agent/ → parent (agent-karate/) → testrail.config.json
+_CONFIG_PATH = Path(__file__).resolve().parent.parent / 'testrail.config.json'
+
+# Requests simultáneas contra TestRail (igual al pool_maxsize del cliente)
+_MAX_WORKERS = 8
+
+# Límite de TestRail Cloud: 180 requests/min (0 = sin límite, p.ej. TestRail Server).
+# Configurable con TestRailSettings.testrail_requests_per_minute (TESTRAIL_REQUESTS_PER_MINUTE)
+_DEFAULT_REQUESTS_PER_MINUTE = 180
+
+# Casos por request en el endpoint bulk update_cases
+_BULK_CHUNK_SIZE = 100
+
+
+class _RateLimiter:
+    """Espacia las requests en paralelo para no superar N requests/min (thread-safe)"""
+    
+    def __init__(self, per_minute: int):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.set_rate(per_minute)
+    
+    def set_rate(self, per_minute: int) -> None:
+        with self._lock:
+            self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+    
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Compartido por todas las instancias: el límite es por cuenta de TestRail, no por sync
+_RATE_LIMITER = _RateLimiter(_DEFAULT_REQUESTS_PER_MINUTE)
+
+
+# Un StringIO por hilo, reutilizado por todos los _build_*
+_SCRATCH = threading.local()
+
+
+def _scratch_buffer() -> io.StringIO:
+    """Per-thread reusable StringIO, emptied before each use"""
+    buf = getattr(_SCRATCH, 'buf', None)
+    if buf is None:
+        buf = _SCRATCH.buf = io.StringIO()
+    else:
+        buf.seek(0)
+        buf.truncate()
+    return buf
 
 
 class MarkdownFormatter:
@@ -34,7 +301,11 @@ class MarkdownFormatter:
     Optimizado para el renderizado específico de TestRail
     """
     
+    _HR = "\n---\n\n"
+    
+    # header/table_header se llaman con los mismos textos en cada caso: memoizados
     @staticmethod
+    @lru_cache(maxsize=256)
     def header(text: str, level: int = 2) -> str:
         """Create header with proper spacing"""
         return f"\n{'#' * level} {text}\n\n"
@@ -57,6 +328,8 @@ class MarkdownFormatter:
     @staticmethod
     def list_item(text: str, indent: int = 0) -> str:
         """List item with optional indentation"""
+        if not indent:
+            return f"- {text}\n"
         return f"{'  ' * indent}- {text}\n"
     
     @staticmethod
@@ -67,7 +340,7 @@ class MarkdownFormatter:
     @staticmethod
     def horizontal_rule() -> str:
         """Horizontal divider"""
-        return "\n---\n\n"
+        return MarkdownFormatter._HR
     
     @staticmethod
     def blockquote(text: str) -> str:
@@ -77,37 +350,49 @@ class MarkdownFormatter:
     @staticmethod
     def table_row(*cells: str) -> str:
         """Create table row"""
-        return "| " + " | ".join(cells) + " |\n"
+        return "".join(("| ", " | ".join(cells), " |\n"))
     
     @staticmethod
+    @lru_cache(maxsize=256)
     def table_header(*headers: str) -> str:
         """Create table header with separator"""
-        header = MarkdownFormatter.table_row(*headers)
-        separator = MarkdownFormatter.table_row(*["---"] * len(headers))
-        return header + separator
+        # Cabecera y separador en un solo join
+        return "".join(("| ", " | ".join(headers), " |\n| ", " | ".join(["---"] * len(headers)), " |\n"))
     
     @staticmethod
+    @lru_cache(maxsize=16)
     def status_badge(status: str) -> str:
         """Create status-specific badge"""
-        badges = {
-            'passed': '✅ **PASSED**',
-            'failed': '❌ **FAILED**',
-            'skipped': '⏭️ **SKIPPED**',
-        }
-        return badges.get(status.lower(), f'❓ **{status.upper()}**')
+        # Los estados de Karate ya vienen en minúsculas: .lower() solo si no hay match directo
+        badge = _STATUS_BADGES.get(status) or _STATUS_BADGES.get(status.lower())
+        return badge or f'❓ **{status.upper()}**'
 
 
 class TestRailSync:
     """Synchronize Karate scenarios to TestRail cases with enhanced formatting"""
     
-    def __init__(self, testrail_client: TestRailClient, project_id: int, suite_id: int):
+    # Secciones por (project_id, suite_id), compartidas por todas las instancias del proceso:
+    # (lista en orden de la API, índice por nombre)
+    _sections_cache: dict[tuple[int, int], tuple[List[dict], dict[str, dict]]] = {}
+    
+    def __init__(
+        self,
+        testrail_client: 'TestRailClient',
+        project_id: int,
+        suite_id: int,
+        requests_per_minute: Optional[int] = None,
+    ):
         self.client = testrail_client
         self.project_id = project_id
         self.suite_id = suite_id
-        self.sections_cache = None
+        self.requests_per_minute = requests_per_minute  # None = mantener el límite actual
+        self._case_index = None  # {custom_automation_id: case}
         self.md = MarkdownFormatter()
         self.pr_id = self._extract_pr_id_from_branch()
         self.automated_type_id = self._get_automated_type_id()  # 🤖 Obtener ID del tipo "Automated"
+        # 👤 Config y usuario asignado: una sola lectura / un solo get_users por instancia
+        self._config = self._load_config()
+        self._assigned_user_id = self._get_assigned_user_id()
     
     @staticmethod
     def _extract_pr_id_from_branch() -> Optional[str]:
@@ -123,7 +408,7 @@ class TestRailSync:
         if 'pull' in github_ref:
             # Ej: refs/pull/123/merge -> extraer 123
             try:
-                pr_match = re.search(r'/pull/(\d+)/', github_ref)
+                pr_match = _PULL_RE.search(github_ref)
                 if pr_match:
                     pr_id = pr_match.group(1)
                     print(f"✓ PR ID desde GITHUB_REF: {pr_id}")
@@ -144,17 +429,8 @@ class TestRailSync:
                 branch_name = result.stdout.strip()
                 print(f"✓ Rama actual: {branch_name}")
                 
-                # Patrones comunes para PR IDs:
-                # PR-123, PR123, issue-456, #789, SCRUM-4, etc
-                patterns = [
-                    r'PR[#-]?(\d+)',      # PR-123 o PR#123
-                    r'issue[#-]?(\d+)',   # issue-456
-                    r'#(\d+)',            # #789
-                    r'([A-Z]+-\d+)',      # SCRUM-4, JIRA-123
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, branch_name, re.IGNORECASE)
+                for pattern in _BRANCH_PATTERNS:
+                    match = pattern.search(branch_name)
                     if match:
                         pr_id = match.group(1)
                         print(f"✓ ID extraído de rama: {pr_id}")
@@ -193,7 +469,12 @@ class TestRailSync:
         Returns: {automation_id: case_id}
         """
         case_map = {}
-        sections = self._get_sections()
+        if self.requests_per_minute is not None:
+            _RATE_LIMITER.set_rate(self.requests_per_minute)
+        # Una sola lectura de secciones por sync (también cuando la suite no tiene ninguna)
+        sections, sections_by_name = self._get_section_cache()
+        # 📥 Una sola descarga de casos por sync; las búsquedas pasan a ser O(1)
+        self._get_case_index(force_refresh=True)
         
         if not sections:
             print("⚠️ No sections found. Creating cases in suite root.")
@@ -202,88 +483,190 @@ class TestRailSync:
             section_id = sections[0]['id']
             print(f"✓ Using section: {sections[0]['name']} (ID: {section_id})")
         
+        # 1️⃣ Clasificar: armar todos los payloads antes de hablar con la API.
+        # Keyed por automation_id: los ejemplos de un Scenario Outline comparten
+        # automation_id y el último resultado es el que queda en TestRail.
+        to_update = {}  # automation_id -> (case_id, case_data)
+        to_create = {}  # section_id -> {automation_id: case_data}
+        
         for result in test_results:
-            # Clean scenario name
-            if result.feature == result.scenario:
-                automation_id = result.feature
-                title = result.feature
-            else:
-                scenario_clean = result.scenario.split('.')[0] if '.' in result.scenario else result.scenario
-                automation_id = f"{result.feature}.{scenario_clean}"
-                title = scenario_clean
+            # Internado: clave compartida por to_update/to_create, case_map y el índice
+            automation_id = sys.intern(result.automation_id)
+            # Clean scenario name (partition devuelve el string entero si no hay '.')
+            title = result.feature if result.feature == result.scenario else result.scenario.partition('.')[0]
             
             existing_case = self._find_case_by_automation_id(automation_id)
             case_data = self._build_case_data(result, automation_id, title)
             
+            # 🗂️ Un feature con sección homónima se crea ahí; si no, en la sección por defecto
+            feature_section = sections_by_name.get(result.feature)
+            target_section_id = feature_section['id'] if feature_section else section_id
+            
             if existing_case:
-                updated = self.client.update_case(existing_case['id'], case_data)
-                if updated:
-                    print(f"✓ Updated case #{existing_case['id']}: {automation_id}")
-                    case_map[automation_id] = existing_case['id']
+                to_update[automation_id] = (existing_case, case_data)
+            elif target_section_id:
+                to_create.setdefault(target_section_id, {})[automation_id] = case_data
             else:
-                if section_id:
-                    created = self.client.add_case(section_id, case_data)
-                    if created:
-                        case_id = created['id']
-                        print(f"✓ Created case #{case_id}: {automation_id}")
-                        
-                        # 🔄 Actualizar campos que solo funcionan en update_case
-                        update_data = {}
-                        if self.automated_type_id:
-                            update_data['type_id'] = self.automated_type_id
-                        if case_data.get('is_automated'):
-                            update_data['is_automated'] = 1  # ✅ Usar 1 en lugar de True
-                        user_id = case_data.get('assigned_to_id')
-                        if user_id:
-                            update_data['assigned_to_id'] = user_id
-                        
-                        if update_data:
-                            self.client.update_case(case_id, update_data)
-                            print(f"  ✓ Updated fields: {list(update_data.keys())}")
-                        
-                        case_map[automation_id] = case_id
-                else:
-                    print(f"⚠️ Cannot create case without section_id: {automation_id}")
+                print(f"⚠️ Cannot create case without section_id: {automation_id}")
+        
+        # 2️⃣ Enviar en bloque: el Session del cliente reutiliza la misma conexión
+        pending_updates = {
+            automation_id: (existing_case['id'], case_data)
+            for automation_id, (existing_case, case_data) in to_update.items()
+        }
+        updated = self._run_parallel(self.client.update_case, pending_updates)
+        updated_count = 0
+        for automation_id, (case_id, _) in pending_updates.items():
+            if updated[automation_id]:
+                logger.info("✓ Updated case #%s: %s", case_id, automation_id)
+                case_map[automation_id] = case_id
+                updated_count += 1
+        
+        created = {}
+        for target_section_id, section_cases in to_create.items():
+            if section_cases:
+                created.update(self._create_cases(target_section_id, section_cases))
+        case_map.update(created)
+        
+        # Un solo resumen por sync, por el mismo logger que el detalle por caso:
+        # así sale después de las líneas por caso que el handler tenga en buffer
+        logger.info(
+            "✓ Synced %d cases: %d created, %d updated",
+            len(case_map), len(created), updated_count
+        )
         
         return case_map
     
-    def _get_sections(self) -> List[dict]:
-        """Get cached sections or fetch from API"""
-        if self.sections_cache is None:
-            self.sections_cache = self.client.get_sections(self.project_id, self.suite_id)
-        return self.sections_cache
+    def _create_cases(self, section_id: int, to_create: dict[str, dict]) -> dict[str, int]:
+        """Create cases with parallel add_case calls → {automation_id: case_id}"""
+        # TestRail no tiene add_cases en bloque: un add_case por caso, en paralelo y con rate limit
+        # (los 429 los reintenta el Session del cliente respetando Retry-After)
+        cases = self._run_parallel(
+            self.client.add_case,
+            {automation_id: (section_id, case_data) for automation_id, case_data in to_create.items()}
+        )
+        created = {automation_id: case for automation_id, case in cases.items() if case}
+        
+        failed = len(to_create) - len(created)
+        if failed:
+            logger.warning("⚠️ Could not create %d case(s) in section %s", failed, section_id)
+        
+        case_index = self._get_case_index()
+        for automation_id, case in created.items():
+            logger.info("✓ Created case #%s: %s", case['id'], automation_id)
+            # Mantener el índice coherente con lo recién creado
+            case_index[automation_id] = {**to_create[automation_id], **case}
+        
+        if not created:
+            return {}
+        
+        # 🔄 Actualizar campos que solo funcionan en update_case
+        # (mismos valores para todos los casos del sync → un solo update_cases).
+        # El payload de creación ya los incluye: solo se corrigen los casos en los que
+        # la respuesta de la API muestra que no se aplicaron.
+        sample = next(iter(to_create.values()))
+        update_data = {}
+        if self.automated_type_id:
+            update_data['type_id'] = self.automated_type_id
+        if sample.get('is_automated'):
+            update_data['is_automated'] = 1  # ✅ Usar 1 en lugar de True
+        user_id = sample.get('assigned_to_id')
+        if user_id:
+            update_data['assigned_to_id'] = user_id
+        
+        case_ids = [
+            case['id'] for case in created.values()
+            if any(case.get(field) != value for field, value in update_data.items())
+        ]
+        if case_ids:
+            for start in range(0, len(case_ids), _BULK_CHUNK_SIZE):
+                chunk = case_ids[start:start + _BULK_CHUNK_SIZE]
+                if not self.client.update_cases(self.suite_id, chunk, update_data):
+                    self._run_parallel(self.client.update_case, {case_id: (case_id, update_data) for case_id in chunk})
+            logger.info("  ✓ Updated fields: %s (%d cases)", list(update_data), len(case_ids))
+        
+        return {automation_id: case['id'] for automation_id, case in created.items()}
+    
+    @staticmethod
+    def _run_parallel(func, jobs: dict) -> dict:
+        """Run func(*args) for every {key: args} job in a bounded, rate-limited thread pool → {key: result}"""
+        if not jobs:
+            return {}
+        
+        def throttled(*args):
+            _RATE_LIMITER.wait()
+            return func(*args)
+        
+        with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(jobs))) as executor:
+            futures = {key: executor.submit(throttled, *args) for key, args in jobs.items()}
+            return {key: future.result() for key, future in futures.items()}
+    
+    def _get_section_cache(self) -> tuple[List[dict], dict[str, dict]]:
+        """Get cached (sections, sections by name) or fetch them from the API"""
+        key = (self.project_id, self.suite_id)
+        cached = self._sections_cache.get(key)
+        if cached is None:
+            sections = self.client.get_sections(self.project_id, self.suite_id)
+            # Si hay nombres repetidos gana la primera sección, igual que un escaneo lineal
+            by_name = {}
+            for section in sections:
+                by_name.setdefault(section.get('name'), section)
+            cached = (sections, by_name)
+            # [] también es lo que devuelve el cliente ante un error: no cachearlo
+            if sections:
+                self._sections_cache[key] = cached
+        return cached
+    
+    @classmethod
+    def invalidate_sections_cache(cls, project_id: int, suite_id: int) -> None:
+        """Forget the cached sections of a suite (e.g. after creating a section)"""
+        cls._sections_cache.pop((project_id, suite_id), None)
+    
+    def _get_case_index(self, force_refresh: bool = False) -> dict[str, dict]:
+        """Fetch all suite cases once (lazy) and index them by custom_automation_id"""
+        if self._case_index is None or force_refresh:
+            # iter_cases propaga los errores (get_cases los convierte en []): un listado
+            # fallido o incompleto no se puede confundir con una suite vacía, o el sync
+            # crearía un duplicado de cada caso existente
+            try:
+                index = {
+                    case['custom_automation_id']: case
+                    for case in self.client.iter_cases(self.project_id, self.suite_id)
+                    if case.get('custom_automation_id')
+                }
+            except Exception as e:
+                raise RuntimeError(
+                    f"Could not fetch cases for suite {self.suite_id}, aborting sync to avoid duplicates: {e}"
+                ) from e
+            self._case_index = index
+        return self._case_index
     
     def _find_case_by_automation_id(self, automation_id: str) -> Optional[dict]:
-        """Query TestRail for case with matching automation_id"""
+        """Look up TestRail case with matching automation_id"""
+        return self._get_case_index().get(automation_id)
+    
+    @staticmethod
+    def _load_config() -> dict:
+        """Leer testrail.config.json una sola vez ({} si no existe o no se puede leer)"""
         try:
-            cases = self.client.get_cases(self.project_id, self.suite_id)
-            for case in cases:
-                if case.get('custom_automation_id') == automation_id:
-                    return case
-            return None
+            if _CONFIG_PATH.is_file():
+                if orjson is not None:
+                    return orjson.loads(_CONFIG_PATH.read_bytes())
+                with _CONFIG_PATH.open('r', encoding='utf-8') as f:
+                    return json.load(f)
+            print(f"⚠️ Config file no encontrado en: {_CONFIG_PATH}")
         except Exception as e:
-            print(f"⚠️ Error searching for case {automation_id}: {e}")
-            return None
+            print(f"⚠️ No se pudo leer config.json: {e}")
+        return {}
     
     def _get_assigned_user_id(self) -> Optional[int]:
         """👤 Obtener ID del usuario asignado (email desde config o env vars)"""
-        email_to_find = None
-        
         # 1️⃣ Intentar obtener del testrail.config.json (PRIORITARIO)
-        try:
-            # Ruta correcta: agent/__file__ → agent/ → parent (agent-karate/) → testrail.config.json
-            config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'testrail.config.json')
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    email_to_find = config.get('qa', {}).get('assigned_email')
-                    user_name = config.get('qa', {}).get('assigned_name', 'QA Lead')
-                    if email_to_find and email_to_find != 'tu@email.com':
-                        print(f"✓ Email de config.json: {email_to_find} ({user_name})")
-            else:
-                print(f"⚠️ Config file no encontrado en: {config_path}")
-        except Exception as e:
-            print(f"⚠️ No se pudo leer config.json: {e}")
+        qa_config = self._config.get('qa', {})
+        email_to_find = qa_config.get('assigned_email')
+        user_name = qa_config.get('assigned_name', 'QA Lead')
+        if email_to_find and email_to_find != 'tu@email.com':
+            print(f"✓ Email de config.json: {email_to_find} ({user_name})")
         
         # 2️⃣ Fallback: env vars
         if not email_to_find:
@@ -323,24 +706,28 @@ class TestRailSync:
         
         return None
     
-    def _build_case_data(self, result: TestResult, automation_id: str, title: str) -> dict:
-        """Build TestRail case payload with all formatted fields"""
-        priority = self._infer_priority(result)
-        description = self._build_description(result)
-        preconditions = self._build_preconditions(result)
-        steps = self._build_steps(result)
-        expected_result = self._build_expected_result(result)
-        assigned_user_id = self._get_assigned_user_id()
+    def _build_case_data(
+        self,
+        result: TestResult,
+        automation_id: str,
+        title: str
+    ) -> dict:
+        """Build TestRail case payload"""
+        return self._render_case_data(result, automation_id, title, _render_case_fields(result))
+    
+    def _render_case_data(self, result: TestResult, automation_id: str, title: str, fields: dict) -> dict:
+        """Build TestRail case payload from the rendered Markdown fields"""
+        assigned_user_id = self._assigned_user_id
         
         case_data = {
             'title': title,
             'type_id': self.automated_type_id,  # 🤖 Tipo Automated
             'custom_automation_id': automation_id,
-            'description': description,
-            'custom_preconds': preconditions,
-            'custom_steps': steps,
-            'custom_expected': expected_result,
-            'priority_id': priority,
+            'description': fields['description'],
+            'custom_preconds': fields['custom_preconds'],
+            'custom_steps': fields['custom_steps'],
+            'custom_expected': fields['custom_expected'],
+            'priority_id': fields['priority_id'],
             'custom_feature': result.feature,
             'custom_status_actual': result.status,
         }
@@ -351,19 +738,16 @@ class TestRailSync:
         
         # 🏷️ Agregar solo tags a references (para filtrar en TestRail)
         if result.tags:
-            case_data['refs'] = ', '.join([f"@{tag}" for tag in result.tags])
-        
-        # Debug: mostrar payload COMPLETO
-        print(f"📋 Payload completo para caso: {automation_id}")
-        print(f"   Fields enviados por API:")
-        for key, value in case_data.items():
-            if key.startswith('custom_preconds') or key.startswith('custom_steps'):
-                print(f"   - {key}: {str(value)[:80]}...")
-            else:
-                print(f"   - {key}: {value}")
-        
-        print(f"   ⚠️ Completa manualmente en TestRail:")
-        print(f"      • Is Automated: Sí")
+            case_data['refs'] = ', '.join(map('@{}'.format, result.tags))
+        
+        # Debug: mostrar payload COMPLETO (solo con DEBUG activo: nada de I/O ni formateo por caso)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📋 Payload completo para caso: %s", automation_id)
+            for key, value in case_data.items():
+                if key.startswith('custom_preconds') or key.startswith('custom_steps'):
+                    logger.debug("   - %s: %.80s...", key, value)
+                else:
+                    logger.debug("   - %s: %s", key, value)
         
         return case_data
     
@@ -371,275 +755,187 @@ class TestRailSync:
     # FORMATTING METHODS - ENHANCED VERSION
     # ============================================================================
     
-    def _build_description(self, result: TestResult) -> str:
+    @staticmethod
+    def _build_description(result: TestResult, duration_str: Optional[str], badge: str) -> str:
         """
         Build main description with enhanced visual hierarchy
         """
-        md = ""
-        
-        # Header con emoji y feature
-        md += self.md.header(f"🧪 {result.feature}", level=2)
-        md += self.md.blockquote(f"**Scenario:** {result.scenario}")
-        
         # ✅ Tags en descripción
+        tags_block = ""
         if result.tags:
-            tags_str = " ".join([f"[{tag}]" for tag in result.tags])
-            md += self.md.blockquote(f"🏷️ **Tags:** {tags_str}")
-        
-        md += "\n"
-        
-        # Stats table con más info y mejor formato
-        md += self.md.header("📊 Test Metrics", level=3)
-        
-        headers = ["Metric", "Value"]
-        md += self.md.table_header(*headers)
-        
-        # Status con emoji grande
-        status_display = self.md.status_badge(result.status)
-        md += self.md.table_row("Status", status_display)
-        
-        # Duration si existe
-        if result.duration:
-            duration_display = f"⏱️ **{result.duration:.3f}s**"
-            md += self.md.table_row("Execution Time", duration_display)
-        
-        # Steps ejecutados
-        if result.steps:
-            md += self.md.table_row("Steps Executed", f"🔢 **{len(result.steps)}**")
-        
-        # Gherkin steps count
-        if result.gherkin_steps:
-            md += self.md.table_row("Gherkin Steps", f"📝 **{len(result.gherkin_steps)}**")
-        
-        # Assertions count
-        if result.expected_assertions:
-            md += self.md.table_row("Assertions", f"🔍 **{len(result.expected_assertions)}**")
-        
-        # Examples si hay Scenario Outline
-        if result.examples:
-            md += self.md.table_row("Test Scenarios", f"📋 **{len(result.examples)}**")
-        
-        md += "\n"
+            tags_str = " ".join(map('[{}]'.format, result.tags))
+            tags_block = f"> 🏷️ **Tags:** {tags_str}\n"
+        
+        # Stats table: qué filas opcionales hay (bitmask) → template ya especializado para esa forma
+        shape = (
+            bool(duration_str)
+            | bool(result.steps) << 1
+            | bool(result.gherkin_steps) << 2
+            | bool(result.expected_assertions) << 3
+            | bool(result.examples) << 4
+        )
         
         # Background steps si existen
+        background_block = ""
         if result.background_steps:
-            md += self.md.header("🎬 Background Setup", level=3)
-            for step in result.background_steps:
-                md += self.md.list_item(self._format_step(step))
-            md += "\n"
-        
-        return md
+            background_block = "".join([
+                "\n### 🎬 Background Setup\n\n",
+                *(f"- {_format_step(step)}\n" for step in result.background_steps),
+                "\n",
+            ])
+        
+        return _description_template(shape).format_map({
+            'feature': result.feature,
+            'scenario': result.scenario,
+            'tags_block': tags_block,
+            'badge': badge,
+            'duration': duration_str,
+            'steps': len(result.steps),
+            'gherkin_steps': len(result.gherkin_steps),
+            'assertions': len(result.expected_assertions),
+            'examples': len(result.examples),
+            'background_block': background_block,
+        })
     
-    def _build_preconditions(self, result: TestResult) -> str:
+    @staticmethod
+    def _build_preconditions(result: TestResult) -> str:
         """
         Build preconditions - clean and professional
         """
-        md = ""
-        
-        if result.background_steps:
-            md += self.md.header("🔧 Prerequisites", level=4)
-            for i, step in enumerate(result.background_steps, 1):
-                # Mostrar exactamente como está en el código
-                md += self.md.numbered_item(step, i)
-        else:
+        if not result.background_steps:
             # IMPORTANTE: No usar fallback genérico - esto ayuda a identificar problemas
-            md += self.md.header("🔧 Prerequisites", level=4)
-            md += self.md.blockquote("ℹ️ Background/Prerequisites not extracted from feature file")
+            return _PRECONDS_MISSING
+        
+        buf = _scratch_buffer()
+        buf.write(_PRECONDS_HEADER)
+        # Mostrar exactamente como está en el código
+        buf.writelines(f"{i}. {step}\n" for i, step in enumerate(result.background_steps, 1))
         
-        return md
+        return buf.getvalue()
     
-    def _build_steps(self, result: TestResult) -> str:
+    @staticmethod
+    def _build_steps(result: TestResult) -> str:
         """
         Build test steps with icons and better organization
         """
-        md = ""
+        if not result.gherkin_steps:
+            # Fallback steps con mejor formato
+            return _FALLBACK_STEPS
         
-        if result.gherkin_steps:
-            md += self.md.header("📋 Test Steps", level=4)
+        table_header = MarkdownFormatter.table_header
+        # Buffer reutilizado; write ligado a un local para no resolver el atributo en cada fragmento
+        buf = _scratch_buffer()
+        w = buf.write
+        w(_STEPS_HEADER)
+        
+        for i, step in enumerate(result.gherkin_steps, 1):
+            # Formatear con icono apropiado
+            formatted = _format_step_with_icon(step)
+            w(f"{i}. {formatted}\n")
+        
+        # Si hay examples, mostrarlos en tabla mejorada
+        if result.examples:
+            w(_EXAMPLES_HEADER)
             
-            for i, step in enumerate(result.gherkin_steps, 1):
-                # Formatear con icono apropiado
-                formatted = self._format_step_with_icon(step)
-                md += self.md.numbered_item(formatted, i)
+            first_example = result.examples[0]
+            headers = tuple(first_example.keys())
             
-            # Si hay examples, mostrarlos en tabla mejorada
-            if result.examples:
-                md += "\n"
-                md += self.md.horizontal_rule()
-                md += self.md.header("📊 Test Data Matrix (Scenario Outline)", level=4)
-                
-                if result.examples:
-                    first_example = result.examples[0]
-                    headers = list(first_example.keys())
-                    
-                    # Headers con emojis
-                    emoji_headers = [f"📌 {h.upper()}" for h in headers]
-                    md += self.md.table_header(*emoji_headers)
-                    
-                    # Limitar a 10 rows para no saturar
-                    for example in result.examples[:10]:
-                        values = [f"`{example.get(h, '')}`" for h in headers]
-                        md += self.md.table_row(*values)
-                    
-                    if len(result.examples) > 10:
-                        md += f"\n> *...and {len(result.examples) - 10} more test scenarios*\n"
-        else:
-            # Fallback steps con mejor formato
-            md += self.md.header("📋 Test Steps", level=4)
-            md += self.md.numbered_item("🎯 **Setup** - Prepare test data and environment", 1)
-            md += self.md.numbered_item("⚡ **Execute** - Send API request with test payload", 2)
-            md += self.md.numbered_item("✅ **Verify** - Check HTTP response status code", 3)
-            md += self.md.numbered_item("✅ **Validate** - Assert response body structure and values", 4)
+            # Headers con emojis
+            emoji_headers = [f"📌 {h.upper()}" for h in headers]
+            w(table_header(*emoji_headers))
+            
+            # Limitar a 10 rows para no saturar; si la fila tiene las mismas columnas
+            # en el mismo orden (lo normal en Examples) se leen los values sin lookups
+            buf.writelines(
+                "| " + " | ".join(
+                    f"`{value}`" for value in (
+                        example.values() if tuple(example) == headers
+                        else (example.get(h, '') for h in headers)
+                    )
+                ) + " |\n"
+                for example in islice(result.examples, 10)
+            )
+            
+            if len(result.examples) > 10:
+                w(f"\n> *...and {len(result.examples) - 10} more test scenarios*\n")
         
-        return md
+        return buf.getvalue()
     
-    def _build_expected_result(self, result: TestResult) -> str:
+    @staticmethod
+    def _build_expected_result(result: TestResult, duration_str: Optional[str], badge: str) -> str:
         """
         Build expected results - SUPER visual y organizado
         """
-        md = ""
+        header = MarkdownFormatter.header
+        buf = _scratch_buffer()
+        w = buf.write
         
-        # Status banner con separadores y más énfasis
-        md += "\n"
-        md += "═══════════════════════════════════════════════════════\n\n"
-        md += self.md.header(self.md.status_badge(result.status), level=2)
-        md += "═══════════════════════════════════════════════════════\n\n"
+        # Status banner con separadores y más énfasis (precalculado para los estados conocidos)
+        banner = _STATUS_BANNERS.get(result.status)
+        w(banner or _STATUS_BANNER_TMPL.format(badge=badge))
         
         # Validations con formato mejorado - SIN TABLA, con formato lista estilizada
         if result.expected_assertions:
-            md += self.md.header("🔍 Validations", level=3)
-            md += "\n"
+            w(header("🔍 Validations", level=3))
+            w("\n")
             
-            for i, assertion in enumerate(result.expected_assertions, 1):
-                clean_assertion = self._clean_assertion(assertion)
-                
-                # Status icon basado en el resultado general
-                if result.status == "passed":
-                    status_icon = "✅"
-                    status_text = "PASS"
-                else:
-                    status_icon = "❌"
-                    status_text = "FAIL"
-                
-                # Formato lista estilizada con números y boxes
-                md += f"**`{i:02d}`** {status_icon} **{status_text}** │ {clean_assertion}\n\n"
+            # Formato de fila elegido una vez según el resultado general (lista con números y boxes)
+            row_fmt = _ASSERTION_ROW_FMT.get(result.status, _ASSERTION_ROW_FMT["failed"]).format
+            clean_assertion = TestRailSync._clean_assertion
+            buf.writelines(
+                row_fmt(i=i, clean=clean_assertion(assertion))
+                for i, assertion in enumerate(result.expected_assertions, 1)
+            )
             
-            md += "\n"
+            w("\n")
         
         # Error details si falló - formato mejorado
         if result.error_message:
-            md += "\n"
-            md += "─────────────────────────────────────────────────────\n\n"
-            md += self.md.header("🔴 Error Details", level=3)
-            md += "\n"
-            md += "⚠️ **The test failed with the following error:**\n\n"
-            
-            # Code block con el error
-            md += self.md.code_block(result.error_message, "")
-            md += "\n"
+            w(_ERROR_SECTION_TMPL.format(error=result.error_message))
         
         # Metadata footer con mejor diseño - SIN tabla, con formato de bloques
-        md += "\n"
-        md += "─────────────────────────────────────────────────────\n\n"
-        md += self.md.header("📌 Test Metadata", level=4)
-        md += "\n"
+        w(_METADATA_HEADER)
         
-        # Formato de bloques en lugar de tabla
-        metadata_items = []
+        # Formato de bloques con bullets en lugar de tabla (directo al buffer)
+        w(f"- 🏷️ **Feature:** `{result.feature}`\n")
+        w(f"- 📊 **Status:** {badge}\n")
         
-        metadata_items.append(f"🏷️ **Feature:** `{result.feature}`")
-        metadata_items.append(f"📊 **Status:** {self.md.status_badge(result.status)}")
-        
-        if result.duration:
-            metadata_items.append(f"⏱️ **Duration:** `{result.duration:.3f}s`")
+        if duration_str:
+            w(f"- ⏱️ **Duration:** `{duration_str}`\n")
         
         if result.steps:
-            metadata_items.append(f"🔢 **Steps Executed:** `{len(result.steps)}`")
+            w(f"- 🔢 **Steps Executed:** `{len(result.steps)}`\n")
         
         if result.gherkin_steps:
-            metadata_items.append(f"📝 **Gherkin Steps:** `{len(result.gherkin_steps)}`")
+            w(f"- 📝 **Gherkin Steps:** `{len(result.gherkin_steps)}`\n")
         
         if result.expected_assertions:
             passed = len(result.expected_assertions) if result.status == "passed" else 0
             total = len(result.expected_assertions)
-            metadata_items.append(f"✅ **Assertions:** `{passed}/{total}` passed")
-        
-        # Mostrar en formato de bloques con bullets
-        for item in metadata_items:
-            md += f"- {item}\n"
+            w(f"- ✅ **Assertions:** `{passed}/{total}` passed\n")
         
-        md += "\n"
+        w("\n")
         
-        return md
+        return buf.getvalue()
     
     # ============================================================================
     # HELPER METHODS
     # ============================================================================
     
-    def _format_step_with_icon(self, step: str) -> str:
-        """
-        Format step with appropriate icon based on keyword
-        """
-        step = step.strip()
-        step_lower = step.lower()
-        
-        # Detect keyword and add icon
-        if step_lower.startswith('given'):
-            icon = "🎯"
-            clean = step[5:].strip()
-            return f"{icon} **Given** {clean}"
-        elif step_lower.startswith('when'):
-            icon = "⚡"
-            clean = step[4:].strip()
-            return f"{icon} **When** {clean}"
-        elif step_lower.startswith('then'):
-            icon = "✅"
-            clean = step[4:].strip()
-            return f"{icon} **Then** {clean}"
-        elif step_lower.startswith('and'):
-            icon = "➕"
-            clean = step[3:].strip()
-            return f"{icon} **And** {clean}"
-        elif 'match' in step_lower:
-            icon = "🔍"
-            return f"{icon} {step}"
-        else:
-            return f"▪️ {step}"
-    
-    def _format_step(self, step: str) -> str:
-        """
-        Format a Gherkin step - remove redundant keywords, clean up
-        """
-        step = step.strip()
-        
-        # Remove redundant Gherkin keywords pero mantener estructura
-        for keyword in ['Given', 'When', 'Then', 'And', 'But']:
-            if step.startswith(f"{keyword} "):
-                step = step[len(keyword):].strip()
-                break
-        
-        return step
-    
-    def _clean_assertion(self, assertion: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _clean_assertion(assertion: str) -> str:
         """
         Clean up assertion text para mejor legibilidad
         Incluye formato visual mejorado
         """
         clean = assertion.strip()
         
-        # Remove verbose keywords pero mantener info útil
-        replacements = {
-            'And match ': '',
-            'match ': '',
-            'Then status ': '**HTTP Status** → ',
-            'And status ': '**HTTP Status** → ',
-            'status ': '**HTTP Status** → ',
-        }
-        
-        for old, new in replacements.items():
-            if clean.startswith(old):
-                clean = new + clean[len(old):].strip()
-                break
+        # Remove verbose keywords pero mantener info útil (un único match anclado)
+        prefix = _ASSERTION_PREFIX_RE.match(clean)
+        if prefix:
+            label = _HTTP_STATUS_LABEL if prefix.lastgroup == 'status' else ''
+            clean = label + clean[prefix.end():].strip()
         
         # Mejorar formato de comparaciones
         if '==' in clean:
@@ -656,36 +952,45 @@ class TestRailSync:
                     clean = f"`{left}` **must equal** `{right}`"
         
         # Highlight de tipos especiales
-        clean = clean.replace("'#array'", "`#array` 📋")
-        clean = clean.replace("'#object'", "`#object` 📦")
-        clean = clean.replace("'#string'", "`#string` 📝")
-        clean = clean.replace("'#number'", "`#number` 🔢")
-        clean = clean.replace("'#boolean'", "`#boolean` ✓/✗")
-        
-        return clean
+        return _TYPE_MARKER_RE.sub(lambda m: _TYPE_MARKERS[m.group(1)], clean)
     
-    def _infer_priority(self, result: TestResult) -> int:
+    @staticmethod
+    def _infer_priority(result: TestResult) -> int:
         """
         Infer priority from scenario characteristics
         1=Don't Test, 2=Low, 3=Medium, 4=High, 5=Critical
         """
-        scenario_lower = result.scenario.lower()
-        feature_lower = result.feature.lower()
-        
-        # Critical indicators
-        if any(x in scenario_lower + feature_lower for x in 
-               ['critical', 'smoke', 'p0', 'blocker', 'security']):
-            return 5  # Critical
-        
-        # High priority
-        if any(x in scenario_lower + feature_lower for x in 
-               ['important', 'main', 'core', 'p1', 'auth']):
-            return 4  # High
-        
-        # Low priority
-        if any(x in scenario_lower + feature_lower for x in 
-               ['edge', 'negative', 'error', 'p3', 'optional']):
-            return 2  # Low
-        
-        # Default: Medium
-        return 3
\ No newline at end of file
+        return _priority_for(result.scenario, result.feature)
+
+
+@lru_cache(maxsize=2048)
+def _priority_for(scenario: str, feature: str) -> int:
+    """Priority for a (scenario, feature) pair; the outline examples repeat the same pair"""
+    text = f"{scenario} {feature}".lower()
+    
+    # Una sola pasada: Critical corta en el primer match, si no gana el nivel más alto
+    best = 0
+    for match in _PRIORITY_RE.finditer(text):
+        level = _PRIORITY_LEVELS[match.group(1)]
+        if level == 5:
+            return level
+        best = max(best, level)
+    
+    # Default: Medium
+    return best or 3
+
+
+def _render_case_fields(result: TestResult) -> dict:
+    """
+    Render the Markdown and priority fields of a case payload.
+    """
+    # ⏱️ Duración y badge de estado calculados una sola vez por caso (los usan description y expected)
+    duration_str = f"{result.duration:.3f}s" if result.duration else None
+    badge = MarkdownFormatter.status_badge(result.status)
+    return {
+        'priority_id': TestRailSync._infer_priority(result),
+        'description': TestRailSync._build_description(result, duration_str, badge),
+        'custom_preconds': TestRailSync._build_preconditions(result),
+        'custom_steps': TestRailSync._build_steps(result),
+        'custom_expected': TestRailSync._build_expected_result(result, duration_str, badge),
+    }